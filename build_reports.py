@@ -0,0 +1,307 @@
+"""Pre-render static report bundles for frequently searched drugs.
+
+Each term in the terms file gets a folder under reports/ with report.json, report.html
+(self-contained, images embedded) and the PNG plots. DGIdb data is fetched serially in this
+process through one low-priority, rate-limited scheduler; only rendering runs in the process
+pool. Terms are only re-rendered when their ClinPGx annotations or cached DGIdb data changed;
+unchanged bundles are just re-stamped with the current annotations version.
+
+Files are rendered into a staging folder and moved into place with os.replace, report.json
+last, so the app never reads a half-written bundle.
+
+Usage:
+    python build_reports.py [--terms data/report_terms.txt] [--workers 4] [--refresh-dgidb]
+"""
+import argparse
+import base64
+import hashlib
+import html
+import json
+import os
+import re
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import pandas as pd
+import seaborn as sns
+
+from dgidb import BATCH, BATCH_BURST, BATCH_RATE, configure_scheduler, fields_for, parse_interactions, post_query
+from ranking import annotation_priority, rank_interactions, top_k
+
+ANNOTATIONS_PATH = "data/clinical_annotations.tsv"
+TERMS_PATH = "data/report_terms.txt"
+REPORTS_DIR = "reports"
+
+HIGH_EVIDENCE = ["1A", "1B", "2A", "2B"]
+VARIANT_COLUMNS = ["Gene", "Variant/Haplotypes", "Phenotype Category", "Level of Evidence", "Clinical Annotation"]
+
+
+# --- Bundle lookup (used by the app pages) ---
+def bundle_dir(term):
+    return os.path.join(REPORTS_DIR, re.sub(r"[^A-Z0-9_.-]", "_", term.strip().upper()))
+
+
+def load_report_bundle(term):
+    """Return the pre-rendered report for a drug, or None if there is no current bundle.
+
+    Bundles rendered from a different clinical_annotations.tsv are ignored, so the
+    pages fall back to live computation after a data update.
+    """
+    bundle = read_bundle(term)
+    if bundle is None or bundle.get("annotations_version") != annotations_version():
+        return None
+    return bundle
+
+
+def read_bundle(term):
+    """Parsed report.json, or None if it is missing, unreadable or lists a missing file."""
+    directory = bundle_dir(term)
+    try:
+        with open(os.path.join(directory, "report.json")) as f:
+            bundle = json.load(f)
+        names = ["report.html", *bundle["images"].values()]
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+    if not all(os.path.exists(os.path.join(directory, name)) for name in names):
+        return None
+    return bundle
+
+
+def annotations_version():
+    """sha256 of the annotations file (re-hashed only when its mtime changes)."""
+    return _file_sha256(ANNOTATIONS_PATH, os.stat(ANNOTATIONS_PATH).st_mtime_ns)
+
+
+@lru_cache(maxsize=4)
+def _file_sha256(path, mtime):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def bundle_file(term, name):
+    return os.path.join(bundle_dir(term), name)
+
+
+def write_json(path, data, **kwargs):
+    """Write JSON to a temp file next to path, then swap it into place."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, **kwargs)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+# --- Report data ---
+@lru_cache(maxsize=1)
+def load_pharm_df():
+    return pd.read_csv(ANNOTATIONS_PATH, sep="\t")
+
+
+@lru_cache(maxsize=1)
+def load_annotation_priority():
+    return annotation_priority(load_pharm_df())
+
+
+def load_dgidb(term, refresh=False):
+    """DGIdb interactions for a drug, cached as dgidb.json in the bundle folder."""
+    path = bundle_file(term, "dgidb.json")
+    if os.path.exists(path) and not refresh:
+        with open(path) as f:
+            return json.load(f)
+    fields = fields_for("Drug")
+    response = post_query("Drug", term, fields, "build_reports", BATCH)
+    response.raise_for_status()
+    columns, interaction_types = parse_interactions(response.json(), "Drug", term, fields)
+    data = {"columns": columns, "interaction_types": interaction_types}
+    os.makedirs(bundle_dir(term), exist_ok=True)
+    write_json(path, data, sort_keys=True)
+    return data
+
+
+def safety_summary(pharm_subset):
+    # Same rules as the Clinician Checker's clinical summary
+    high = pharm_subset[pharm_subset["Level of Evidence"].isin(HIGH_EVIDENCE)]
+    category = high["Phenotype Category"].fillna("")
+    return {
+        "high_risk_toxicity": int(category.str.contains("Toxicity", case=False).sum()),
+        "efficacy": int(category.str.contains("Efficacy", case=False).sum()),
+        "dosage": int(category.str.contains("Dosage", case=False).sum()),
+        "important_genes": sorted(high["Gene"].dropna().unique().tolist()),
+    }
+
+
+# --- Rendering ---
+def save_figure(fig, path):
+    fig.savefig(path, bbox_inches="tight")
+    plt.close(fig)
+
+
+def render_plots(interactions, pharm_subset, directory):
+    """Write the report PNGs into directory and return {title: file name}."""
+    images = {}
+    if not interactions.empty:
+        top_df = top_k(interactions, "Priority", 10)
+        fig, ax = plt.subplots(figsize=(10, 6))
+        sns.barplot(data=top_df, x="Priority", y="Gene", palette="mako", ax=ax)
+        ax.set_xlabel("Priority (interaction score + annotation evidence)")
+        save_figure(fig, os.path.join(directory, "top_interactions.png"))
+        images["Top Interactions by Priority"] = "top_interactions.png"
+
+    if not pharm_subset.empty:
+        gene_counts = pharm_subset["Gene"].value_counts().head(10)
+        fig, ax = plt.subplots()
+        sns.barplot(x=gene_counts.index, y=gene_counts.values, ax=ax, palette="viridis")
+        ax.set_ylabel("Number of Variants")
+        ax.set_xlabel("Gene")
+        ax.set_title("Top 10 Genes by Variant Count")
+        ax.tick_params(axis="x", rotation=45)
+        save_figure(fig, os.path.join(directory, "gene_variant_counts.png"))
+        images["1. Top Genes with Most Variant Annotations"] = "gene_variant_counts.png"
+
+        fig, ax = plt.subplots()
+        sns.countplot(
+            data=pharm_subset,
+            x="Phenotype Category",
+            order=pharm_subset["Phenotype Category"].value_counts().index,
+            palette="coolwarm",
+            ax=ax
+        )
+        ax.set_title("Phenotype Categories Across Variants", fontweight="bold")
+        ax.set_xlabel("Phenotype Category", fontweight="bold")
+        ax.set_ylabel("Count", fontweight="bold")
+        ax.tick_params(axis="x", rotation=45)
+        save_figure(fig, os.path.join(directory, "phenotype_categories.png"))
+        images["2. Phenotype Category Distribution"] = "phenotype_categories.png"
+
+        top_genes = pharm_subset["Gene"].value_counts().nlargest(10).index
+        top_genes_data = pharm_subset[pharm_subset["Gene"].isin(top_genes)]
+        heatmap_data = pd.crosstab(top_genes_data["Gene"], top_genes_data["Clinical Annotation"])
+        if not heatmap_data.empty:  # every Clinical Annotation can be blank
+            fig, ax = plt.subplots(figsize=(10, 6))
+            sns.heatmap(heatmap_data, cmap="YlGnBu", annot=True, fmt="d", linewidths=.5, ax=ax)
+            ax.set_title("Top 10 Genes vs Clinical Annotation Heatmap", fontweight="bold")
+            ax.set_xlabel("Clinical Annotation", fontweight="bold")
+            ax.set_ylabel("Gene", fontweight="bold")
+            save_figure(fig, os.path.join(directory, "gene_annotation_heatmap.png"))
+            images["3. Heatmap: Gene vs. Clinical Annotation"] = "gene_annotation_heatmap.png"
+    return images
+
+
+def render_html(term, interactions, pharm_subset, summary, images, directory):
+    title = html.escape(term)
+    sections = [f"<h1>{title}</h1>", "<h2>Safety Summary</h2><ul>"]
+    sections.append(f"<li>High-risk toxicity variants: {summary['high_risk_toxicity']}</li>")
+    sections.append(f"<li>Efficacy variants: {summary['efficacy']}</li>")
+    sections.append(f"<li>Dosage variants: {summary['dosage']}</li>")
+    sections.append(f"<li>Key genes: {html.escape(', '.join(summary['important_genes']) or 'None')}</li></ul>")
+    sections.append("<h2>Interaction Table</h2>" + interactions.to_html(index=False))
+    sections.append("<h2>Pharmacogenomic Variants</h2>" + pharm_subset[VARIANT_COLUMNS].to_html(index=False))
+    for heading, name in images.items():
+        with open(os.path.join(directory, name), "rb") as f:
+            encoded = base64.b64encode(f.read()).decode()
+        sections.append(f"<h2>{heading}</h2><img src='data:image/png;base64,{encoded}'>")
+    return f"<html><head><meta charset='utf-8'><title>{title}</title></head><body>{''.join(sections)}</body></html>"
+
+
+def build_report(term, dgidb):
+    """Render one bundle from fetched DGIdb data.
+
+    Returns (term, status); a failure leaves the previous bundle in place.
+    """
+    try:
+        return term, _build_report(term, dgidb)
+    except Exception as e:
+        return term, f"failed: {e}"
+
+
+def _build_report(term, dgidb):
+    pharm_df = load_pharm_df()
+    pharm_subset = pharm_df[pharm_df["Drug(s)"].str.upper() == term].reset_index(drop=True)
+    # Every row listing this drug feeds the ranking, including multi-drug rows
+    ranking_rows = pharm_df[pharm_df["Drug(s)"].fillna("").str.upper().str.split(";").map(lambda drugs: term in drugs)]
+
+    fingerprint = hashlib.sha256(
+        (ranking_rows.to_csv(index=False) + json.dumps(dgidb, sort_keys=True)).encode()
+    ).hexdigest()
+    version = annotations_version()
+    previous = read_bundle(term)
+    if previous is not None and previous.get("fingerprint") == fingerprint:
+        if previous.get("annotations_version") == version:
+            return "unchanged"
+        # The data file changed elsewhere; this drug's rows did not, so skip re-rendering
+        previous["annotations_version"] = version
+        write_json(bundle_file(term, "report.json"), previous, allow_nan=False)
+        return "re-stamped"
+
+    os.makedirs(bundle_dir(term), exist_ok=True)
+    interactions = pd.DataFrame(dgidb["columns"])
+    if not interactions.empty:
+        interactions = rank_interactions(interactions, "Drug", term, load_annotation_priority())
+    summary = safety_summary(pharm_subset)
+
+    staging = tempfile.mkdtemp(prefix=".staging-", dir=bundle_dir(term))
+    try:
+        images = render_plots(interactions, pharm_subset, staging)
+        with open(os.path.join(staging, "report.html"), "w") as f:
+            f.write(render_html(term, interactions, pharm_subset, summary, images, staging))
+        for name in ["report.html", *images.values()]:
+            os.replace(os.path.join(staging, name), bundle_file(term, name))
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+    write_json(bundle_file(term, "report.json"), {
+        "term": term,
+        "annotations_version": version,
+        "fingerprint": fingerprint,
+        "interactions": interactions.to_dict(orient="list"),
+        "interaction_types": dgidb["interaction_types"],
+        "images": images,
+    }, allow_nan=False)
+    return "rendered"
+
+
+def read_terms(path):
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--terms", default=TERMS_PATH, help="File with one drug name per line")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of worker processes")
+    parser.add_argument("--refresh-dgidb", action="store_true", help="Re-fetch DGIdb data instead of using the cache")
+    args = parser.parse_args()
+
+    terms = list(dict.fromkeys(term.strip().upper() for term in read_terms(args.terms)))
+    os.makedirs(REPORTS_DIR, exist_ok=True)
+
+    # Fetch serially here so all DGIdb traffic goes through one batch-rate scheduler
+    batch_scheduler = configure_scheduler(global_rate=BATCH_RATE, global_burst=BATCH_BURST)
+    fetched = {}
+    for term in terms:
+        try:
+            fetched[term] = load_dgidb(term, refresh=args.refresh_dgidb)
+        except Exception as e:
+            print(f"{term}: failed: {e}")
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {term: pool.submit(build_report, term, dgidb) for term, dgidb in fetched.items()}
+        for term, future in futures.items():
+            try:
+                term, status = future.result()
+            except Exception as e:  # e.g. a worker process died
+                status = f"failed: {e}"
+            print(f"{term}: {status}")
+    print(f"DGIdb request queue: {batch_scheduler.metrics()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+import ast
+import glob
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from functools import lru_cache
+
+import requests
+
+DGIDB_URL = "https://dgidb.org/api/graphql"
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+# Streamlit doesn't configure logging for app modules; without a handler the metrics are dropped
+if not logger.handlers and not logging.getLogger().handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(levelname)s: %(message)s"))
+    logger.addHandler(_handler)
+
+# --- Root query field per search mode ---
+ROOT_FIELD = {"Drug": "drugs", "Gene": "genes"}
+
+# --- Pages declare the interaction fields they display in a module-level DGIDB_FIELDS dict ---
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pages")
+
+# --- Field path -> (table column, value used when DGIdb returns null) ---
+COLUMNS = {
+    "gene.name": ("Gene", "N/A"),
+    "gene.longName": ("Description", "N/A"),
+    "drug.name": ("Drug", "N/A"),
+    "drug.conceptId": ("ID", "N/A"),
+    "interactionScore": ("Score", 0),
+}
+
+# --- Outbound rate limits (requests per second, burst size) ---
+GLOBAL_RATE, GLOBAL_BURST = 5.0, 10
+SESSION_RATE, SESSION_BURST = 1.0, 3
+MAX_QUEUED_PER_SESSION = 20
+# Offline batch jobs (build_reports.py) run in their own process with their own, lower limit
+BATCH_RATE, BATCH_BURST = 1.0, 1
+METRICS_LOG_EVERY = 50  # log queue metrics every N dispatched requests
+
+# --- Request priorities: interactive searches always go before batch / warm-up work ---
+INTERACTIVE, BATCH = 0, 1
+
+
+class DGIdbError(Exception):
+    """Raised when DGIdb answers with GraphQL errors and no data."""
+
+
+@lru_cache(maxsize=1)
+def page_fields(pages_dir=PAGES_DIR):
+    """Read each page's DGIDB_FIELDS literal, in page order, without running the pages.
+
+    Pages are Streamlit scripts that only run when opened, so their declarations are
+    read from source; this way a search knows every page's fields up front.
+    """
+    declared = []
+    for path in sorted(glob.glob(os.path.join(pages_dir, "*.py"))):
+        with open(path, encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=path)
+        for node in tree.body:
+            if isinstance(node, ast.Assign) and any(
+                isinstance(target, ast.Name) and target.id == "DGIDB_FIELDS" for target in node.targets
+            ):
+                declared.append(ast.literal_eval(node.value))
+    return declared
+
+
+def fields_for(mode):
+    """Merged, de-duplicated field paths every page needs for a search mode."""
+    merged = []
+    for fields in page_fields():
+        for field in fields.get(mode, []):
+            if field not in merged:
+                merged.append(field)
+    return tuple(merged)
+
+
+@lru_cache(maxsize=32)
+def build_query(mode, fields):
+    """Return the query document for a field set.
+
+    The search term is passed as a GraphQL variable, so the document only depends
+    on (mode, fields) and is built once per field set.
+    """
+    tree = {}
+    for path in fields:
+        node = tree
+        for part in path.split("."):
+            node = node.setdefault(part, {})
+    query = (
+        f"query($names: [String!]!) {{ {ROOT_FIELD[mode]}(names: $names) "
+        f"{{ nodes {{ name interactions {{ {_selection(tree)} }} }} }} }}"
+    )
+    return query
+
+
+def post_query(mode, name, fields=None, session_id="anonymous", priority=INTERACTIVE):
+    """POST one search to DGIdb through the shared scheduler.
+
+    requests already negotiates gzip/deflate compressed responses.
+    """
+    query = build_query(mode, fields or fields_for(mode))
+    return scheduler.run(session_id, lambda: requests.post(
+        DGIDB_URL,
+        json={"query": query, "variables": {"names": [name]}},
+        timeout=30,
+    ), priority)
+
+
+def parse_interactions(results, mode, name, fields=None):
+    """Flatten a DGIdb response into table columns plus a flat list of interaction types.
+
+    Only nodes whose name matches `name` exactly (case-insensitive) are kept. Raises
+    DGIdbError when the response carries GraphQL errors instead of data.
+    """
+    if results.get("errors") and not (results.get("data") or {}).get(ROOT_FIELD[mode]):
+        raise DGIdbError("; ".join(str(e.get("message", e)) for e in results["errors"]))
+    fields = fields or fields_for(mode)
+    columns = {}
+    accessors = []
+    for field in COLUMNS:  # table column order doesn't depend on page declaration order
+        if field not in fields:
+            continue
+        column, default = COLUMNS[field]
+        head, _, tail = field.partition(".")
+        accessors.append((columns.setdefault(column, []), head, tail, default))
+    want_types = "interactionTypes.type" in fields
+    types = []
+
+    nodes = ((results.get("data") or {}).get(ROOT_FIELD[mode]) or {}).get("nodes") or []
+    for node in nodes:
+        if (node.get("name") or "").upper() != name:
+            continue
+        for interaction in node.get("interactions") or []:
+            for values, head, tail, default in accessors:
+                value = (interaction.get(head) or {}).get(tail) if tail else interaction.get(head)
+                values.append(default if value is None else value)
+            if want_types:
+                types.extend(t.get("type") for t in interaction.get("interactionTypes") or [])
+    return columns, types
+
+
+class QueueFullError(Exception):
+    """Raised when a session already has too many DGIdb requests waiting."""
+
+
+class TokenBucket:
+    """`rate` tokens per second, holding at most `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def delay(self, now):
+        """Seconds until a token is available (0 if one is available now)."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class _Ticket:
+    __slots__ = ("enqueued", "admitted")
+
+    def __init__(self):
+        self.enqueued = time.monotonic()
+        self.admitted = False
+
+
+class RequestScheduler:
+    """Admission control and fair queuing for outbound DGIdb requests.
+
+    Each call waits in its session's queue until both the global and the session
+    token bucket allow it. Sessions are served round-robin within a priority, and
+    interactive requests are admitted before batch ones.
+
+    Limits and priorities only apply within one process: every Streamlit session in the
+    app shares one scheduler, while build_reports.py gets its own, capped at BATCH_RATE.
+    """
+
+    def __init__(self, global_rate=GLOBAL_RATE, global_burst=GLOBAL_BURST,
+                 session_rate=SESSION_RATE, session_burst=SESSION_BURST,
+                 max_queued_per_session=MAX_QUEUED_PER_SESSION):
+        self.session_rate = session_rate
+        self.session_burst = session_burst
+        self.max_queued_per_session = max_queued_per_session
+        self._cond = threading.Condition()
+        self._global = TokenBucket(global_rate, global_burst)
+        self._buckets = {}
+        # priority -> session_id -> queued tickets; dict order is the round-robin order
+        self._queues = {INTERACTIVE: OrderedDict(), BATCH: OrderedDict()}
+        self._waits = deque(maxlen=500)
+        self._dispatched = 0
+        self._rejected = 0
+
+    def run(self, session_id, fn, priority=INTERACTIVE):
+        """Block until the request is admitted, then call `fn()` and return its result."""
+        ticket = _Ticket()
+        with self._cond:
+            queue = self._queues[priority].setdefault(session_id, deque())
+            if len(queue) >= self.max_queued_per_session:
+                self._rejected += 1
+                logger.warning("DGIdb request rejected, session queue full: %s", self.metrics())
+                raise QueueFullError(
+                    "Too many DGIdb requests are waiting for this session. Please wait for them to finish."
+                )
+            queue.append(ticket)
+            if session_id not in self._buckets:
+                if len(self._buckets) > 1000:
+                    self._prune_buckets()
+                self._buckets[session_id] = TokenBucket(self.session_rate, self.session_burst)
+            while not ticket.admitted:
+                delay = self._admit_ready()
+                if not ticket.admitted:
+                    self._cond.wait(timeout=delay)
+        return fn()
+
+    def metrics(self):
+        """Queue depth and recent wait times (seconds)."""
+        with self._cond:
+            waits = sorted(self._waits)
+
+            def percentile(p):
+                return round(waits[min(len(waits) - 1, int(p * len(waits)))], 3) if waits else 0.0
+
+            return {
+                "queued_interactive": sum(len(q) for q in self._queues[INTERACTIVE].values()),
+                "queued_batch": sum(len(q) for q in self._queues[BATCH].values()),
+                "active_sessions": len(self._buckets),
+                "dispatched": self._dispatched,
+                "rejected": self._rejected,
+                "wait_p50_s": percentile(0.5),
+                "wait_p95_s": percentile(0.95),
+                "wait_max_s": round(waits[-1], 3) if waits else 0.0,
+            }
+
+    def _admit_ready(self):
+        # Admit every ticket the buckets allow right now; return how long until the next one could go.
+        # Called with the lock held.
+        while True:
+            now = time.monotonic()
+            delay = self._global.delay(now)
+            if delay > 0:
+                return delay
+            admitted = False
+            for priority in (INTERACTIVE, BATCH):
+                queues = self._queues[priority]
+                for session_id, queue in list(queues.items()):
+                    session_delay = self._buckets[session_id].delay(now)
+                    if session_delay > 0:
+                        delay = session_delay if delay == 0 else min(delay, session_delay)
+                        continue
+                    ticket = queue.popleft()
+                    ticket.admitted = True
+                    self._global.take()
+                    self._buckets[session_id].take()
+                    self._waits.append(now - ticket.enqueued)
+                    self._dispatched += 1
+                    if self._dispatched % METRICS_LOG_EVERY == 0:
+                        logger.info("DGIdb request queue: %s", self.metrics())
+                    if queue:
+                        queues.move_to_end(session_id)
+                    else:
+                        del queues[session_id]
+                    admitted = True
+                    break
+                if admitted:
+                    break
+            if not admitted:
+                return delay or None
+            self._cond.notify_all()
+
+    def _prune_buckets(self):
+        now = time.monotonic()
+        queued = set(self._queues[INTERACTIVE]) | set(self._queues[BATCH])
+        for session_id, bucket in list(self._buckets.items()):
+            if session_id not in queued and bucket.delay(now) == 0 and bucket.tokens >= bucket.capacity:
+                del self._buckets[session_id]
+
+
+# Module-level so every Streamlit session in this process shares it
+scheduler = RequestScheduler()
+
+
+def configure_scheduler(**limits):
+    """Replace this process's scheduler, e.g. with lower limits for a batch job."""
+    global scheduler
+    scheduler = RequestScheduler(**limits)
+    return scheduler
+
+
+def _selection(tree):
+    return " ".join(key if not sub else f"{key} {{ {_selection(sub)} }}" for key, sub in tree.items())
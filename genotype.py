@@ -0,0 +1,90 @@
+import gzip
+import io
+import itertools
+import re
+
+
+def build_variant_index(variants):
+    """Map each lowercase rsID / star allele to the positions of the annotations listing it.
+
+    `variants` is the Variant/Haplotypes column in row order; cells such as
+    "CYP2D6*1, CYP2D6*4" are split on commas and empty cells are skipped.
+    """
+    index = {}
+    for pos, value in enumerate(variants):
+        if not isinstance(value, str):
+            continue
+        for variant in value.split(","):
+            variant = variant.strip().lower()
+            if variant:
+                index.setdefault(variant, []).append(pos)
+    return index
+
+
+def expand_genotype_token(token):
+    # "CYP2D6*1/*4" -> ["cyp2d6*1", "cyp2d6*4"], "rs1234" -> ["rs1234"]
+    token = token.strip().lower()
+    if "*" in token and "/" in token:
+        gene = token.split("*", 1)[0]
+        return [allele if allele.startswith(gene) else gene + allele for allele in token.split("/") if allele]
+    return [token] if token else []
+
+
+def is_called(fields):
+    # A VCF record counts as called if the first sample's GT carries a non-reference allele
+    if len(fields) < 10:
+        return True  # sites-only VCF
+    gt = fields[9].split(":", 1)[0]
+    return any(allele not in ("0", ".") for allele in re.split(r"[/|]", gt))
+
+
+def match_genotype_file(genotype_file, variant_index):
+    """Stream a (gzipped) VCF or rsID/star-allele list and return matched annotation row positions.
+
+    `genotype_file` is a seekable binary file object. Returns (sorted row positions,
+    sorted matched variant names).
+
+    The format is decided once from the first line: VCF files start with ##fileformat or
+    #CHROM, anything else is read as a genotype list. VCF records only count when the first
+    sample carries a non-reference allele. List files have no reference allele to compare
+    against, so every listed variant counts as carried unless its genotype is a no-call (--).
+
+    The file is read one line at a time and only the matched variants are kept. Streamlit's
+    file_uploader still holds the whole upload in memory, up to server.maxUploadSize (200 MB
+    by default), so larger whole-genome VCFs need that limit raised.
+    """
+    stream = genotype_file
+    stream.seek(0)
+    is_gzipped = stream.read(2) == b"\x1f\x8b"
+    stream.seek(0)
+    if is_gzipped:
+        stream = io.BufferedReader(gzip.GzipFile(fileobj=stream), buffer_size=1 << 20)
+    first_line = stream.readline()
+    is_vcf = first_line.startswith((b"##fileformat", b"#CHROM"))
+    lines = itertools.chain([first_line], stream)
+
+    id_keys = {variant.encode() for variant in variant_index}
+    matched_positions = set()
+    found_variants = set()
+    for line in lines:
+        if line[:1] == b"#":
+            continue
+        if is_vcf:
+            # CHROM POS ID REF ... (cheap byte lookup first, most IDs miss)
+            fields = line.split(b"\t", 3)
+            if len(fields) < 4 or (fields[2] not in id_keys and b";" not in fields[2]):
+                continue
+            ids = [i for i in fields[2].decode("utf-8", "ignore").lower().split(";") if i in variant_index]
+            if not ids or not is_called(line.rstrip(b"\r\n").decode("utf-8", "ignore").split("\t")):
+                continue
+            variants = ids
+        else:
+            # rsIDs and/or star alleles separated by whitespace or commas, e.g. 23andMe "rsid chrom pos genotype"
+            tokens = re.split(r"[\s,]+", line.decode("utf-8", "ignore").strip())
+            if "--" in tokens:
+                continue  # no-call
+            variants = [v for t in tokens for v in expand_genotype_token(t) if v in variant_index]
+        for variant in variants:
+            found_variants.add(variant)
+            matched_positions.update(variant_index[variant])
+    return sorted(matched_positions), sorted(found_variants)
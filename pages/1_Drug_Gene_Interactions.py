@@ -1,13 +1,26 @@
 import streamlit as st
-import requests
 import pandas as pd
-import json
 import time
+import uuid
+from build_reports import load_report_bundle
+from dgidb import INTERACTIVE, fields_for, parse_interactions, post_query
+from ranking import annotation_priority, rank_interactions
 
 st.title("Drug - Gene Interactions")
 st.markdown("Search by Drug or Gene name to explore drug-gene interactions.")
 st.markdown("---")
 
+# Interaction fields this page reads (rank_interactions needs the label column and Score)
+DGIDB_FIELDS = {
+    "Drug": ["gene.name", "interactionScore"],
+    "Gene": ["drug.name", "interactionScore"],
+}
+
+# --- Annotation evidence used to rank results, computed once per data file ---
+@st.cache_data
+def load_annotation_priority():
+    return annotation_priority(pd.read_csv("data/clinical_annotations.tsv", sep="\t"))
+
 # --- Initialize session state ---
 if "mode" not in st.session_state:
     st.session_state["mode"] = "Drug"
@@ -23,6 +36,8 @@ if "searched" not in st.session_state:
     st.session_state["searched"] = False
 if "valid_search" not in st.session_state:
     st.session_state["valid_search"] = False
+if "session_id" not in st.session_state:
+    st.session_state["session_id"] = uuid.uuid4().hex  # DGIdb request queue key
 
 # --- Detect mode change and reset input ---
 prev_mode = st.session_state.get("mode", "Drug")
@@ -68,80 +83,29 @@ if search_triggered and input_val:
         progress_bar.progress(i)
         time.sleep(0.005)  # simulate progress for UX
 
-    url = "https://dgidb.org/api/graphql"
-    safe_name = json.dumps(input_val_upper)  # GraphQL-safe
-
-    if mode == "Drug":
-        query = f"""
-        {{
-          drugs(names: [{safe_name}]) {{
-            nodes {{
-              name
-              interactions {{
-                gene {{
-                  name
-                  longName
-                }}
-                interactionScore
-              }}
-            }}
-          }}
-        }}
-        """
-    else:
-        query = f"""
-        {{
-          genes(names: [{safe_name}]) {{
-            nodes {{
-              name
-              interactions {{
-                drug {{
-                  name
-                  conceptId
-                }}
-                interactionScore
-                interactionTypes {{
-                   type
-                }}
-              }}
-            }}
-          }}
-        }}
-        """
-
     try:
-        response = requests.post(url, json={"query": query})
-        interactions = []
-        if response.status_code == 200:
-            results = response.json()
-            if mode == "Drug":
-                nodes = results.get("data", {}).get("drugs", {}).get("nodes", [])
-                exact_nodes = [n for n in nodes if n.get("name", "").upper() == input_val_upper]
-                for node in exact_nodes:
-                    for interaction in node.get("interactions", []):
-                        gene = interaction["gene"]
-                        interactions.append({
-                            "Gene": gene.get("name", "N/A"),
-                            "Description": gene.get("longName", "N/A"),
-                            "Score": interaction.get("interactionScore", 0)
-                        })
+        bundle = load_report_bundle(input_val_upper) if mode == "Drug" else None
+        if bundle is not None:
+            # Pre-rendered report (build_reports.py): already ranked, no API call needed
+            interactions = pd.DataFrame(bundle["interactions"])
+            interaction_types = bundle["interaction_types"]
+        else:
+            fields = fields_for(mode)
+            response = post_query(mode, input_val_upper, fields, st.session_state["session_id"], INTERACTIVE)
+            if response.status_code == 200:
+                columns, interaction_types = parse_interactions(response.json(), mode, input_val_upper, fields)
+                interactions = pd.DataFrame(columns)
+                if not interactions.empty:
+                    interactions = rank_interactions(interactions, mode, input_val_upper, load_annotation_priority())
             else:
-                nodes = results.get("data", {}).get("genes", {}).get("nodes", [])
-                exact_nodes = [n for n in nodes if n.get("name", "").upper() == input_val_upper]
-                for node in exact_nodes:
-                    for interaction in node.get("interactions", []):
-                        drug = interaction["drug"]
-                        interactions.append({
-                            "Drug": drug.get("name", "N/A"),
-                            "ID": drug.get("conceptId", "N/A"),
-                            "Score": interaction.get("interactionScore", 0)
-                        })
-            
+                interactions = None
+        
+        if interactions is not None:
             # Store dataframe in session_state but do NOT display table on homepage
-            if interactions:
-                st.session_state["df"] = pd.DataFrame(interactions)
+            if not interactions.empty:
+                st.session_state["df"] = interactions
                 st.session_state["valid_search"] = True
-                st.session_state["results"] = results  # Store full results for interaction types
+                st.session_state["interaction_types"] = interaction_types  # For the interaction types chart
                 st.success(f"✅ Search completed for **{input_val_upper}**! Use the sidebar to explore results.")
             else:
                 st.session_state["valid_search"] = False
@@ -1,5 +1,13 @@
 import streamlit as st
 import pandas as pd
+from build_reports import bundle_file, load_report_bundle
+from ranking import top_k
+
+# Interaction fields this page displays (merged into the DGIdb search query)
+DGIDB_FIELDS = {
+    "Drug": ["gene.name", "gene.longName", "interactionScore"],
+    "Gene": ["drug.name", "drug.conceptId", "interactionScore"],
+}
 
 st.title("Interaction Table")
 st.markdown("---")
@@ -35,20 +43,20 @@ st.info(f"📊 Currently viewing results for: **{input_val}**")
 # Show search summary
 st.subheader("Search Summary")
 if mode == "Gene":
-    top_drug = df.sort_values("Score", ascending=False).iloc[0]["Drug"]
+    top_drug = top_k(df, "Priority", 1).iloc[0]["Drug"]
     st.markdown(f"""
     **Gene Searched**: `{input_val}`   
     **Number of interacting drugs**: `{len(df)}`  
-    **Top scoring drug**: `{top_drug}`  
+    **Top priority drug**: `{top_drug}`  
     🔗 [DrugBank](https://go.drugbank.com/unearth/q?query={top_drug}&searcher=drugs)    
     🔗 [PubChem](https://pubchem.ncbi.nlm.nih.gov/#query={top_drug})
     """)
 else:
-    top_gene = df.sort_values("Score", ascending=False).iloc[0]["Gene"]
+    top_gene = top_k(df, "Priority", 1).iloc[0]["Gene"]
     st.markdown(f"""
     **Drug Searched**: `{input_val}`  
     **Number of interacting genes**: `{len(df)}`  
-    **Top scoring gene**: `{top_gene}`  
+    **Top priority gene**: `{top_gene}`  
     🔗 [GeneCards](https://www.genecards.org/cgi-bin/carddisp.pl?gene={top_gene})  
     🔗 [NCBI](https://www.ncbi.nlm.nih.gov/gene/?term={top_gene})
     """)
@@ -58,11 +66,17 @@ st.markdown("---")
 st.subheader("Full Interaction Table")
 
 # Show DataFrame
+st.caption("_Priority combines the DGIdb interaction score with ClinPGx annotation score and evidence level._")
 st.dataframe(df, use_container_width=True)
 
 # Download button
 st.download_button("📥 Download as CSV", df.to_csv(index=False), file_name="interaction_data.csv")
 
+# Full pre-rendered report, when build_reports.py has generated one for this drug
+if mode == "Drug" and load_report_bundle(input_val) is not None:
+    with open(bundle_file(input_val, "report.html"), "rb") as f:
+        st.download_button("📥 Download full report (HTML)", f.read(), file_name=f"{input_val}_report.html", mime="text/html")
+
 # Pharmacogenomic data section
 pharm_df = pd.read_csv("data/clinical_annotations.tsv", sep="\t")
 
@@ -2,6 +2,14 @@ import streamlit as st
 import matplotlib.pyplot as plt
 import pandas as pd
 import seaborn as sns
+from build_reports import bundle_file, load_report_bundle
+from ranking import top_k
+
+# Interaction fields this page displays (merged into the DGIdb search query)
+DGIDB_FIELDS = {
+    "Drug": ["gene.name", "interactionScore", "interactionTypes.type"],
+    "Gene": ["drug.name", "interactionScore", "interactionTypes.type"],
+}
 
 st.title("Interaction Visuals")
 st.markdown("---")
@@ -34,7 +42,7 @@ else:
 # Display what results are being shown
 st.info(f"📊 Currently viewing results for: **{input_val}**")
 
-st.subheader("Top Interactions by Score")
+st.subheader("Top Interactions by Priority")
 
 # Safe slider logic
 num_rows = len(df)
@@ -42,15 +50,15 @@ if num_rows < 4:
     st.info(f"Only {num_rows} interactions found. Displaying all available results.")
     top_n = num_rows
 else:
-    top_n = st.slider("Select top N entries by score", 3, min(10, num_rows), min(5, num_rows))
+    top_n = st.slider("Select top N entries by priority", 3, min(10, num_rows), min(5, num_rows))
 
-top_df = df.sort_values("Score", ascending=False).head(top_n)
+top_df = top_k(df, "Priority", top_n)
 
 # Barplot
 st.markdown("#### **Barplot**")
 fig2, ax2 = plt.subplots(figsize=(10, 6))
-sns.barplot(data=top_df, x="Score", y=label_col, palette="mako", ax=ax2)
-ax2.set_xlabel("Interaction Score")
+sns.barplot(data=top_df, x="Priority", y=label_col, palette="mako", ax=ax2)
+ax2.set_xlabel("Priority (interaction score + annotation evidence)")
 ax2.set_ylabel(label_col)
 st.pyplot(fig2)
 
@@ -61,7 +69,7 @@ st.markdown("### ")
 st.markdown("#### **Pie Chart**")
 fig1, ax1 = plt.subplots()
 colors = sns.color_palette("pastel", len(top_df))  
-ax1.pie(top_df["Score"], labels=top_df[label_col], autopct="%1.1f%%", startangle=90, colors=colors)
+ax1.pie(top_df["Priority"], labels=top_df[label_col], autopct="%1.1f%%", startangle=90, colors=colors)
 ax1.axis("equal")
 st.pyplot(fig1)
 
@@ -69,11 +77,7 @@ st.pyplot(fig1)
 st.markdown("---")
 
 # Interaction types
-types = []
-for node in st.session_state.get("results", {}).get("data", {}).get("genes", {}).get("nodes", []):
-    for interaction in node.get("interactions", []):
-        for i_type in interaction.get("interactionTypes", []):
-            types.append(i_type.get("type"))
+types = [t for t in st.session_state.get("interaction_types", []) if t]
 
 if types:
     st.subheader("Most Common Interaction Types")
@@ -102,6 +106,17 @@ if mode == "Drug":
         st.info("No pharmacogenomics annotations available for this drug.")
         st.stop()
 
+    # Serve pre-rendered plots when build_reports.py has a bundle for this drug
+    bundle = load_report_bundle(input_val)
+    if bundle is not None:
+        for title, name in bundle["images"].items():
+            if name == "top_interactions.png":
+                continue  # drawn live above, it follows the top N slider
+            st.markdown(f"### **{title}**")
+            st.image(bundle_file(input_val, name))
+            st.markdown("### ")
+        st.stop()
+
     st.markdown("### **1. Top Genes with Most Variant Annotations**")
     gene_counts = pharm_subset_index['Gene'].value_counts().head(10)
     fig1, ax1 = plt.subplots()
@@ -1,5 +1,9 @@
 import streamlit as st
 import pandas as pd
+import re
+from genotype import build_variant_index, match_genotype_file
+from phenotypes import build_phenotype_index, search_phenotypes
+from ranking import evidence_weighted_score
 
 st.set_page_config(page_title="Clinician Safety Checker", layout="wide")
 st.title("Clinician Safety Checker")
@@ -31,6 +35,7 @@ def load_annotations():
         "Drug(s)",
         "Phenotype Category",
         "Level of Evidence",
+        "Score",
         "Clinical Annotation"
     ]]
     df.columns = [
@@ -39,17 +44,34 @@ def load_annotations():
         "Drug",
         "Response",
         "Evidence Level",
+        "Score",
         "Note"
     ]
     return df
 
+# --- Variant index: lowercase rsID / star allele -> annotation row positions ---
+@st.cache_data
+def load_variant_index():
+    return build_variant_index(load_annotations()["Variant"])
+
+# --- Phenotype full-text index: trigram -> ids of distinct phenotype terms ---
+@st.cache_resource
+def load_phenotype_index():
+    df = load_annotations()
+    return build_phenotype_index(df["Note"], df["Response"])
+
+def download_stem(text):
+    # "patient.vcf.gz" -> "patient", "Genotype File" -> "genotype_file"
+    stem = re.sub(r"(\.(vcf|txt|tsv|csv))?(\.gz)?$", "", text, flags=re.IGNORECASE)
+    return re.sub(r"[^a-z0-9]+", "_", stem.lower()).strip("_")
+
 annotations_df = load_annotations()
 
 # --- Search type selection ---
 prev_search_type = st.session_state.get("clinic_type", "Drug")
 search_type = st.radio(
     "Search by:",
-    ["Drug", "Disease/Phenotype", "Gene"],
+    ["Drug", "Disease/Phenotype", "Gene", "Genotype File"],
     horizontal=True,
 )
 
@@ -62,15 +84,26 @@ if search_type != prev_search_type:
 st.session_state.clinic_type = search_type
 
 # --- Input field (maintains lowercase, converts for search) ---
-search_input = st.text_input(
-    f"Type {search_type.lower()} name:",
-    value=st.session_state.clinic_input,
-    placeholder=f"e.g., {'warfarin' if search_type == 'Drug' else 'hemorrhage' if search_type == 'Disease/Phenotype' else 'CYP2C19'}",
-    key="clinic_text_input"
-).strip()
+if search_type == "Genotype File":
+    uploaded_file = st.file_uploader(
+        "Upload patient genotype file:",
+        type=["vcf", "gz", "txt", "tsv"],
+        help="VCF (optionally gzipped) with rsIDs in the ID column, or a list of rsIDs / star alleles (e.g., CYP2C19*2, CYP2D6*1/*4). "
+             "In list files every listed variant counts as carried, since reference alleles are not known.",
+        key="clinic_genotype_file"
+    )
+    search_input = uploaded_file.name if uploaded_file is not None else ""
+else:
+    uploaded_file = None
+    search_input = st.text_input(
+        f"Type {search_type.lower()} name:",
+        value=st.session_state.clinic_input,
+        placeholder=f"e.g., {'warfarin' if search_type == 'Drug' else 'hemorrhage' if search_type == 'Disease/Phenotype' else 'CYP2C19'}",
+        key="clinic_text_input"
+    ).strip()
 
-# Update session state with current input
-st.session_state.clinic_input = search_input
+    # Update session state with current input
+    st.session_state.clinic_input = search_input
 
 # --- Search button ---
 search_button = st.button("Search", type="primary")
@@ -79,8 +112,16 @@ search_button = st.button("Search", type="primary")
 if search_button and search_input:
     st.session_state.clinic_search_triggered = True
     st.session_state.clinic_last_searched = search_input
+    if uploaded_file is not None:
+        with st.spinner("Matching genotype file against variant annotations..."):
+            positions, found = match_genotype_file(uploaded_file, load_variant_index())
+        st.session_state.clinic_genotype_positions = positions
+        st.session_state.clinic_genotype_variants = found
 elif search_button and not search_input:
-    st.warning(f"⚠️ Please enter a {search_type.lower()} name to search.")
+    if search_type == "Genotype File":
+        st.warning("⚠️ Please upload a genotype file (VCF or rsID / star-allele list) to search.")
+    else:
+        st.warning(f"⚠️ Please enter a {search_type.lower()} name to search.")
     st.session_state.clinic_search_triggered = False
 
 # --- Display results if search has been triggered ---
@@ -94,21 +135,33 @@ if st.session_state.clinic_search_triggered and st.session_state.clinic_last_sea
             annotations_df["Drug"].str.lower() == search_term.lower()
         ]
     elif current_type == "Disease/Phenotype":
-        matched = annotations_df[
-            annotations_df["Note"].str.lower() == search_term.lower()
-        ]
-    else:  # Gene search
+        phenotype_index = load_phenotype_index()
+        term_ids, is_partial = search_phenotypes(search_term, phenotype_index)
+        positions = list(dict.fromkeys(pos for i in term_ids for pos in phenotype_index[1][i]))
+        matched = annotations_df.iloc[positions]
+        if term_ids:
+            matched_terms = ", ".join(phenotype_index[0][i] for i in term_ids[:10])
+            if is_partial:
+                st.caption(f"No phenotype contains **'{search_term}'**; showing closest matches: {matched_terms}")
+            else:
+                st.caption(f"Matching phenotypes: {matched_terms}{' ...' if len(term_ids) > 10 else ''}")
+    elif current_type == "Gene":
         matched = annotations_df[
             annotations_df["Gene"].str.lower() == search_term.lower()
         ]
+    else:  # Genotype file
+        matched = annotations_df.iloc[st.session_state.get("clinic_genotype_positions", [])]
+        found_variants = st.session_state.get("clinic_genotype_variants", [])
+        if found_variants:
+            st.caption(f"Patient variants with annotations: {', '.join(found_variants)}")
 
     # --- Display results ---
     if not matched.empty:
         st.success(f"Found **{len(matched)}** variant annotations")
         st.markdown("---")
 
-        # --- 1. Clinical Summary (Drug only) ---
-        if current_type == "Drug":
+        # --- 1. Clinical Summary (Drug/Genotype File only) ---
+        if current_type in ["Drug", "Genotype File"]:
             st.markdown("### 📋 Clinical Summary")
             
             high_risk = matched[
@@ -150,26 +203,26 @@ if st.session_state.clinic_search_triggered and st.session_state.clinic_last_sea
             st.markdown("---")
 
             
-        # --- 2. Recommended Gene Panel (Drug/Disease only) ---
-        if current_type in ["Drug", "Disease/Phenotype"]:
+        # --- 2. Recommended Gene Panel (Drug/Disease/Genotype File only) ---
+        if current_type in ["Drug", "Disease/Phenotype", "Genotype File"]:
             st.markdown("### 🧬 Recommended Gene Panel")
             st.caption("_Generated from variants with Evidence Level 1A, 1B, 2A, 2B only_")
 
             panel_df = matched[matched["Evidence Level"].isin(["1A", "1B", "2A", "2B"])].copy()
+            panel_df["Priority"] = evidence_weighted_score(panel_df["Evidence Level"], panel_df["Score"])
             
             if not panel_df.empty:
                 gene_group = panel_df.groupby('Gene').agg({
                     'Variant': lambda x: ", ".join(sorted(set(x.dropna()))),
                     'Drug': lambda x: ", ".join(sorted(set(x.dropna()))),
-                    'Evidence Level': lambda x: x.mode()[0] if not x.empty else None
+                    'Evidence Level': lambda x: x.mode()[0] if not x.empty else None,
+                    'Priority': 'max'
                 }).reset_index()
                 
-                priority = {"1A": 1, "1B": 2, "2A": 3, "2B": 4}
-                gene_group['priority'] = gene_group['Evidence Level'].map(priority)
-                gene_group = gene_group.sort_values('priority')
+                gene_group = gene_group.sort_values('Priority', ascending=False)
                 
                 for _, row in gene_group.iterrows():
-                    if current_type == "Disease/Phenotype":
+                    if current_type in ["Disease/Phenotype", "Genotype File"]:
                         st.markdown(f"**{row['Gene']}** (Evidence: {row['Evidence Level']})  \n"
                               f"   • Variants: {row['Variant']}  \n"
                               f"   • Associated drugs: {row['Drug']}")
@@ -249,7 +302,7 @@ if st.session_state.clinic_search_triggered and st.session_state.clinic_last_sea
             st.download_button(
                 "📥 Download filtered results as CSV",
                 data=filtered_matched.to_csv(index=False),
-                file_name=f"{search_term.replace(' ', '_')}_{current_type.lower()}_variant_safety.csv",
+                file_name=f"{download_stem(search_term)}_{download_stem(current_type)}_variant_safety.csv",
                 mime="text/csv"
             )
         else:
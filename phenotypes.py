@@ -0,0 +1,52 @@
+def trigrams_of(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def build_phenotype_index(*columns):
+    """Trigram index over the distinct ';'-separated phenotype terms in `columns`.
+
+    Each column is a sequence of cells in row order (e.g. Clinical Annotation and
+    Phenotype Category). Returns (sorted terms, row positions per term, trigram -> term ids).
+    """
+    term_rows = {}
+    for column in columns:
+        for pos, value in enumerate(column):
+            if not isinstance(value, str):
+                continue
+            for term in value.split(";"):
+                term = term.strip().lower()
+                if term:
+                    term_rows.setdefault(term, set()).add(pos)
+    terms = sorted(term_rows)
+    rows = [sorted(term_rows[term]) for term in terms]
+    trigrams = {}
+    for term_id, term in enumerate(terms):
+        for gram in trigrams_of(term):
+            trigrams.setdefault(gram, set()).add(term_id)
+    return terms, rows, trigrams
+
+
+def search_phenotypes(query, index):
+    """Return (ranked term ids, is_partial) for a phenotype query.
+
+    Substring hits come from intersecting the query's trigram postings and are ranked
+    exact > prefix > shorter term. If nothing contains the query, terms sharing at least
+    half of its trigrams are returned instead, most shared first.
+    """
+    terms, _, trigrams = index
+    query = query.strip().lower()
+    grams = trigrams_of(query)
+    if grams:
+        candidates = set.intersection(*(trigrams.get(gram, set()) for gram in grams))
+    else:
+        candidates = range(len(terms))  # queries shorter than 3 characters
+    hits = [i for i in candidates if query in terms[i]]
+    if hits:
+        return sorted(hits, key=lambda i: (terms[i] != query, not terms[i].startswith(query), len(terms[i]), terms[i])), False
+
+    shared = {}
+    for gram in grams:
+        for term_id in trigrams.get(gram, ()):
+            shared[term_id] = shared.get(term_id, 0) + 1
+    partial = [i for i, count in shared.items() if count / len(grams) >= 0.5]
+    return sorted(partial, key=lambda i: (-shared[i], len(terms[i]), terms[i]))[:10], True
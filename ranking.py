@@ -0,0 +1,63 @@
+import pandas as pd
+import numpy as np
+
+# --- Evidence level weights (ClinPGx 1A highest, 4 lowest) ---
+EVIDENCE_WEIGHT = {"1A": 1.0, "1B": 0.85, "2A": 0.7, "2B": 0.55, "3": 0.3, "4": 0.1}
+
+
+def evidence_weighted_score(levels, scores):
+    """Annotation Score scaled by its evidence level weight (negative scores count as 0)."""
+    weight = levels.astype(str).map(EVIDENCE_WEIGHT).fillna(0)
+    score = pd.to_numeric(scores, errors="coerce").fillna(0).clip(lower=0)
+    return weight * np.log1p(score)
+
+
+def annotation_priority(pharm_df):
+    """Best evidence-weighted annotation score per (GENE, DRUG) pair.
+
+    Multi-gene and multi-drug rows (e.g. "ANKK1;DRD2") count for every gene and drug listed.
+    Callers cache the result per data file.
+    """
+    pharm_df = pharm_df.assign(
+        Weighted=evidence_weighted_score(pharm_df["Level of Evidence"], pharm_df["Score"]),
+        Gene=pharm_df["Gene"].str.upper().str.split(";"),
+        Drug=pharm_df["Drug(s)"].str.upper().str.split(";"),
+    ).explode("Gene").explode("Drug")
+    return pharm_df.groupby(["Gene", "Drug"])["Weighted"].max()
+
+
+def rank_interactions(df, mode, searched, annotation_priority):
+    """Add a Priority column combining DGIdb interactionScore with annotation evidence.
+
+    Both parts are log-scaled and normalized to 0-1 before being averaged, so a strong
+    clinical annotation can lift a gene/drug with a modest interaction score.
+    """
+    label_col = "Gene" if mode == "Drug" else "Drug"
+    labels = df[label_col].astype(str).str.upper()
+    searched = str(searched).upper()
+    if mode == "Drug":
+        pairs = pd.MultiIndex.from_arrays([labels, [searched] * len(df)])
+    else:
+        pairs = pd.MultiIndex.from_arrays([[searched] * len(df), labels])
+
+    interaction = np.log1p(pd.to_numeric(df["Score"], errors="coerce").fillna(0).clip(lower=0).to_numpy())
+    evidence = annotation_priority.reindex(pairs).fillna(0).to_numpy()
+
+    priority = 0.5 * _normalize(interaction) + 0.5 * _normalize(evidence)
+    return df.assign(Priority=priority.round(4))
+
+
+def top_k(df, column, k):
+    """Return the k rows with the largest `column`, best first, without sorting the whole frame."""
+    k = min(k, len(df))
+    if k <= 0:
+        return df.iloc[0:0]
+    values = df[column].to_numpy()
+    idx = np.argpartition(-values, k - 1)[:k]
+    idx = idx[np.argsort(-values[idx], kind="stable")]
+    return df.iloc[idx]
+
+
+def _normalize(values):
+    peak = values.max() if len(values) else 0
+    return values / peak if peak > 0 else np.zeros_like(values, dtype=float)
@@ -0,0 +1,73 @@
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("pandas")
+pytest.importorskip("seaborn")
+pytest.importorskip("requests")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import build_reports  # noqa: E402
+
+HEADER = "Variant/Haplotypes\tGene\tLevel of Evidence\tScore\tPhenotype Category\tDrug(s)\tClinical Annotation\n"
+WARFARIN = "rs9923231\tVKORC1\t1A\t20\tDosage\twarfarin\t\n"
+DGIDB = {"columns": {"Gene": ["VKORC1"], "Description": ["N/A"], "Score": [3.2]}, "interaction_types": ["inhibitor"]}
+
+
+@pytest.fixture
+def reports(tmp_path, monkeypatch):
+    monkeypatch.setattr(build_reports, "REPORTS_DIR", str(tmp_path / "reports"))
+    monkeypatch.setattr(build_reports, "ANNOTATIONS_PATH", str(tmp_path / "annotations.tsv"))
+    write_annotations(tmp_path, WARFARIN, mtime=1)
+    yield tmp_path
+    build_reports.load_pharm_df.cache_clear()
+    build_reports.load_annotation_priority.cache_clear()
+
+
+def write_annotations(tmp_path, rows, mtime):
+    path = tmp_path / "annotations.tsv"
+    path.write_text(HEADER + rows)
+    os.utime(path, (mtime, mtime))
+    build_reports.load_pharm_df.cache_clear()
+    build_reports.load_annotation_priority.cache_clear()
+
+
+def test_rendered_bundle_is_served(reports):
+    assert build_reports.build_report("WARFARIN", DGIDB) == ("WARFARIN", "rendered")
+    bundle = build_reports.load_report_bundle("warfarin")
+    assert bundle["interactions"]["Gene"] == ["VKORC1"]
+    assert all(os.path.exists(build_reports.bundle_file("WARFARIN", name)) for name in bundle["images"].values())
+    assert not [name for name in os.listdir(build_reports.bundle_dir("WARFARIN")) if name.startswith(".")]
+
+
+def test_unrelated_data_change_restamps_without_rendering(reports):
+    build_reports.build_report("WARFARIN", DGIDB)
+    html_mtime = os.stat(build_reports.bundle_file("WARFARIN", "report.html")).st_mtime_ns
+    write_annotations(reports, WARFARIN + "rs4149056\tSLCO1B1\t1A\t10\tToxicity\tsimvastatin\t\n", mtime=2)
+    assert build_reports.load_report_bundle("WARFARIN") is None
+
+    assert build_reports.build_report("WARFARIN", DGIDB) == ("WARFARIN", "re-stamped")
+    assert build_reports.load_report_bundle("WARFARIN") is not None
+    assert os.stat(build_reports.bundle_file("WARFARIN", "report.html")).st_mtime_ns == html_mtime
+    assert build_reports.build_report("WARFARIN", DGIDB) == ("WARFARIN", "unchanged")
+
+
+def test_change_to_the_drug_rows_re_renders(reports):
+    build_reports.build_report("WARFARIN", DGIDB)
+    write_annotations(reports, WARFARIN + "rs1057910\tCYP2C9\t1A\t30\tDosage\twarfarin\t\n", mtime=2)
+    assert build_reports.build_report("WARFARIN", DGIDB) == ("WARFARIN", "rendered")
+
+
+def test_truncated_or_incomplete_bundle_is_ignored(reports):
+    build_reports.build_report("WARFARIN", DGIDB)
+    report_json = build_reports.bundle_file("WARFARIN", "report.json")
+    with open(report_json) as f:
+        content = f.read()
+
+    os.remove(build_reports.bundle_file("WARFARIN", "gene_variant_counts.png"))
+    assert build_reports.load_report_bundle("WARFARIN") is None
+
+    with open(report_json, "w") as f:
+        f.write(content[:len(content) // 2])
+    assert build_reports.load_report_bundle("WARFARIN") is None
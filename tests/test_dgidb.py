@@ -0,0 +1,45 @@
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("requests")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dgidb import DGIdbError, build_query, fields_for, parse_interactions  # noqa: E402
+
+
+@pytest.mark.parametrize("mode, label", [("Drug", "gene.name"), ("Gene", "drug.name")])
+def test_every_search_requests_fields_the_ranking_reads(mode, label):
+    fields = fields_for(mode)
+    assert label in fields
+    assert "interactionScore" in fields
+    assert "interactionTypes.type" in fields
+
+
+def test_build_query_passes_names_as_variable():
+    query = build_query("Drug", ("gene.name", "interactionScore"))
+    assert query == (
+        "query($names: [String!]!) { drugs(names: $names) "
+        "{ nodes { name interactions { gene { name } interactionScore } } } }"
+    )
+
+
+def test_parse_interactions_keeps_exact_name_and_column_order():
+    results = {"data": {"drugs": {"nodes": [
+        {"name": "WARFARIN", "interactions": [
+            {"gene": {"name": "VKORC1", "longName": None}, "interactionScore": 3.2,
+             "interactionTypes": [{"type": "inhibitor"}]},
+        ]},
+        {"name": "WARFARIN SODIUM", "interactions": [{"gene": {"name": "CYP2C9"}}]},
+    ]}}}
+    fields = ("interactionScore", "gene.name", "gene.longName", "interactionTypes.type")
+    columns, types = parse_interactions(results, "Drug", "WARFARIN", fields)
+    assert list(columns) == ["Gene", "Description", "Score"]
+    assert columns == {"Gene": ["VKORC1"], "Description": ["N/A"], "Score": [3.2]}
+    assert types == ["inhibitor"]
+
+
+def test_parse_interactions_raises_on_graphql_errors():
+    with pytest.raises(DGIdbError, match="bad field"):
+        parse_interactions({"errors": [{"message": "bad field"}], "data": None}, "Gene", "EGFR")
@@ -0,0 +1,67 @@
+import gzip
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from genotype import build_variant_index, expand_genotype_token, is_called, match_genotype_file  # noqa: E402
+
+VARIANTS = ["rs4149056", "rs9923231", "CYP2D6*1, CYP2D6*4", float("nan"), "rs1057910", "rs4149056"]
+VCF_HEADER = b"##fileformat=VCFv4.2\n#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\tFORMAT\tSAMPLE\n"
+
+
+def match(content):
+    return match_genotype_file(io.BytesIO(content), build_variant_index(VARIANTS))
+
+
+def test_build_variant_index_splits_haplotypes_and_skips_empty_cells():
+    index = build_variant_index(VARIANTS)
+    assert index["rs4149056"] == [0, 5]
+    assert index["cyp2d6*1"] == [2]
+    assert index["cyp2d6*4"] == [2]
+    assert "nan" not in index
+
+
+def test_expand_genotype_token():
+    assert expand_genotype_token("CYP2D6*1/*4") == ["cyp2d6*1", "cyp2d6*4"]
+    assert expand_genotype_token("CYP2D6*1/CYP2D6*4") == ["cyp2d6*1", "cyp2d6*4"]
+    assert expand_genotype_token("RS4149056") == ["rs4149056"]
+    assert expand_genotype_token("  ") == []
+
+
+def test_is_called():
+    record = "12\t5\trs1\tT\tC\t.\t.\t.\tGT:DP\t{}".format
+    assert is_called(record("0/1:10").split("\t"))
+    assert is_called(record("1|1").split("\t"))
+    assert not is_called(record("0/0:10").split("\t"))
+    assert not is_called(record("./.").split("\t"))
+    assert is_called("12\t5\trs1\tT\tC\t.\t.\t.".split("\t"))  # sites-only
+
+
+def test_vcf_keeps_only_called_records():
+    vcf = VCF_HEADER + (
+        b"12\t21331549\trs4149056\tT\tC\t.\t.\t.\tGT\t0/1\n"
+        b"16\t31107689\trs9923231\tC\tT\t.\t.\t.\tGT\t0/0\n"
+        b"10\t96741053\trs1057910\tA\tC\t.\t.\t.\tGT\t./.\n"
+    )
+    assert match(vcf) == ([0, 5], ["rs4149056"])
+
+
+def test_gzipped_vcf_and_multi_id_records():
+    vcf = VCF_HEADER + b"16\t31107689\trs0;rs9923231\tC\tT\t.\t.\t.\tGT\t1/1\n"
+    assert match(gzip.compress(vcf)) == ([1], ["rs9923231"])
+
+
+def test_tab_separated_list_with_numeric_chromosome_is_not_vcf():
+    genotypes = b"# rsid\tchromosome\tposition\tgenotype\nrs4149056\t12\t21331549\tTC\nrs9923231\t16\t31107689\t--\n"
+    assert match(genotypes) == ([0, 5], ["rs4149056"])
+
+
+def test_star_allele_list():
+    assert match(b"CYP2D6*1/*4\n") == ([2], ["cyp2d6*1", "cyp2d6*4"])
+
+
+def test_no_matches():
+    assert match(VCF_HEADER + b"1\t100\t.\tA\tG\t.\t.\t.\tGT\t1/1\n") == ([], [])
+    assert match(b"") == ([], [])
@@ -0,0 +1,42 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from phenotypes import build_phenotype_index, search_phenotypes  # noqa: E402
+
+NOTES = ["Hemorrhage", "Thrombosis;Hemorrhage", "Intracranial Hemorrhage", float("nan"), "Hiv Infectious Disease"]
+CATEGORIES = ["Toxicity", "Efficacy;Toxicity", "Toxicity", "Dosage", "Efficacy"]
+INDEX = build_phenotype_index(NOTES, CATEGORIES)
+
+
+def search(query):
+    terms, rows, _ = INDEX
+    term_ids, is_partial = search_phenotypes(query, INDEX)
+    return [terms[i] for i in term_ids], is_partial
+
+
+def test_index_splits_terms_across_columns():
+    terms, rows, _ = INDEX
+    assert rows[terms.index("hemorrhage")] == [0, 1]
+    assert rows[terms.index("toxicity")] == [0, 1, 2]
+    assert rows[terms.index("dosage")] == [3]
+
+
+def test_substring_hits_ranked_exact_then_prefix_then_shorter():
+    assert search("hemorrhage") == (["hemorrhage", "intracranial hemorrhage"], False)
+    assert search("HIV") == (["hiv infectious disease"], False)
+
+
+def test_short_queries_scan_all_terms():
+    assert search("is")[0] == ["thrombosis", "hiv infectious disease"]
+
+
+def test_typo_falls_back_to_partial_matches():
+    terms, is_partial = search("hemorhage")
+    assert is_partial
+    assert terms[0] == "hemorrhage"
+
+
+def test_no_match():
+    assert search("xyzzy") == ([], True)
@@ -0,0 +1,88 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("requests")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dgidb import BATCH, INTERACTIVE, QueueFullError, RequestScheduler  # noqa: E402
+
+
+def start(scheduler, order, session_id, priority, count):
+    threads = []
+    for i in range(count):
+        thread = threading.Thread(
+            target=scheduler.run,
+            args=(session_id, lambda i=i: order.append((session_id, i)), priority),
+        )
+        thread.start()
+        threads.append(thread)
+    return threads
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_interactive_admitted_before_queued_batch():
+    scheduler = RequestScheduler(global_rate=20, global_burst=1, session_rate=100, session_burst=100)
+    order = []
+    threads = start(scheduler, order, "batch", BATCH, 6)
+    wait_until(lambda: scheduler.metrics()["queued_batch"] >= 4)
+
+    threads += start(scheduler, order, "clinician", INTERACTIVE, 1)
+    for thread in threads:
+        thread.join()
+
+    # Only batch requests admitted before the clinician arrived may go first
+    assert order.index(("clinician", 0)) <= 6 - 4
+    assert len(order) == 7
+
+
+def test_sessions_served_round_robin():
+    scheduler = RequestScheduler(global_rate=20, global_burst=1, session_rate=100, session_burst=100)
+    order = []
+    threads = start(scheduler, order, "heavy", INTERACTIVE, 6)
+    wait_until(lambda: scheduler.metrics()["queued_interactive"] >= 5)
+    threads += start(scheduler, order, "light", INTERACTIVE, 2)
+    for thread in threads:
+        thread.join()
+
+    # "light" alternates with "heavy" instead of waiting behind its whole backlog
+    sessions = [session for session, _ in order]
+    last_light = max(i for i, session in enumerate(sessions) if session == "light")
+    assert last_light <= len(sessions) - 3
+    assert sessions.count("heavy") == 6 and sessions.count("light") == 2
+
+
+def test_session_rate_limit_does_not_block_other_sessions():
+    scheduler = RequestScheduler(global_rate=100, global_burst=10, session_rate=1, session_burst=1)
+    order = []
+    threads = start(scheduler, order, "limited", INTERACTIVE, 2)
+    wait_until(lambda: len(order) >= 1)
+    started = time.monotonic()
+    threads += start(scheduler, order, "other", INTERACTIVE, 1)
+    threads[-1].join()
+
+    assert time.monotonic() - started < 0.5
+    for thread in threads:
+        thread.join()
+
+
+def test_rejects_when_session_queue_is_full(caplog):
+    scheduler = RequestScheduler(session_rate=0.5, session_burst=1, max_queued_per_session=1)
+    scheduler.run("greedy", lambda: None)  # uses the only token
+    waiting = threading.Thread(target=scheduler.run, args=("greedy", lambda: None), daemon=True)
+    waiting.start()
+    wait_until(lambda: scheduler.metrics()["queued_interactive"] == 1)
+
+    with pytest.raises(QueueFullError):
+        scheduler.run("greedy", lambda: None)
+    assert scheduler.metrics()["rejected"] == 1
+    assert "session queue full" in caplog.text